@@ -1,37 +1,344 @@
 import sys
+import math
+from functools import lru_cache
 import numpy as np
-from scipy.optimize import curve_fit
-from scipy.integrate import simpson as simps
 from PyQt5.QtWidgets import (QApplication, QMainWindow, QWidget, QVBoxLayout, QHBoxLayout,
-                            QPushButton, QLabel, QLineEdit, QTableWidget, QTableWidgetItem,
+                            QPushButton, QLabel, QLineEdit, QTableWidget, QTableWidgetItem, QTableView,
                             QFileDialog, QMessageBox, QGroupBox, QScrollArea,
                             QSizePolicy, QHeaderView, QSplitter, QComboBox,
                             QCheckBox)
-from PyQt5.QtCore import Qt, QSettings
-from PyQt5.QtGui import QDoubleValidator, QColor, QFont
+from PyQt5.QtCore import (Qt, QSettings, QTimer, QObject, QRunnable, QThreadPool, pyqtSignal,
+                          QAbstractTableModel, QModelIndex)
+from PyQt5.QtGui import QDoubleValidator, QColor, QFont, QBrush
+import matplotlib
 from matplotlib.backends.backend_qt5agg import FigureCanvasQTAgg as FigureCanvas
 from matplotlib.backends.backend_qt5agg import NavigationToolbar2QT as NavigationToolbar
 from matplotlib.figure import Figure
 from matplotlib.patches import Rectangle
+from matplotlib.collections import PatchCollection
 import os
 
+try:
+    import numexpr as ne  # Optional: fused single-pass model evaluation
+except ImportError:
+    ne = None
+
+try:
+    from numba import njit, vectorize  # Optional: compiled model and Levenberg-Marquardt fit
+except ImportError:
+    njit = None
+    vectorize = None
+
+try:
+    import pandas as pd  # Optional: C parser for faster text imports
+except ImportError:
+    pd = None
+
+# Agg rendering of long traces: merge sub-pixel segments and stroke in chunks
+matplotlib.rcParams.update({
+    'path.simplify': True,
+    'path.simplify_threshold': 1.0,
+    'agg.path.chunksize': 10000,
+})
+
 # Physical constants
 HC_KEV_ANGSTROM = 12.39842  # h*c (keV·Å)
 MIN_FIT_POINTS = 6
 
+# Gaussian FWHM / sigma = 2*sqrt(2*ln(2))
+FWHM_SIGMA = 2.0 * math.sqrt(2.0 * math.log(2.0))
+
+# Gaussian + linear baseline model, evaluated by numexpr in one pass
+GAUSS_BASELINE_EXPR = "a * exp(-(x - x0)**2 / (2 * sigma**2)) + b * x + c"
+
+# NumPy model evaluation switches to in-place ops (one temporary) above this size
+INPLACE_MIN_POINTS = 256
+
+# Calibration polynomial E = a*Ch² + b*Ch + c in Horner form
+CALIBRATION_EXPR = "(a * ch + b) * ch + c"
+
+# Levenberg-Marquardt settings for the compiled fit (mirror the curve_fit call)
+LM_TOL = 1e-6
+LM_MAX_NFEV = 5000
+
+# numba's on-disk cache needs the source .py, which a frozen (PyInstaller) build
+# does not ship; caching there fails at decoration time, so compile per run instead
+NUMBA_CACHE = not getattr(sys, 'frozen', False)
+
+if njit is not None:
+    @njit(cache=NUMBA_CACHE, nogil=True)
+    def _residual_jac(params, x, y):
+        """Residuals and analytic Jacobian of the Gaussian + baseline model"""
+        a, x0, sigma, b, c = params[0], params[1], params[2], params[3], params[4]
+        n = x.size
+        resid = np.empty(n)
+        jac = np.empty((n, 5))
+        inv_s2 = 1.0 / (sigma * sigma)
+        for i in range(n):
+            dx = x[i] - x0
+            g = np.exp(-0.5 * dx * dx * inv_s2)
+            resid[i] = a * g + b * x[i] + c - y[i]
+            jac[i, 0] = g
+            jac[i, 1] = a * g * dx * inv_s2
+            jac[i, 2] = jac[i, 1] * dx / sigma
+            jac[i, 3] = x[i]
+            jac[i, 4] = 1.0
+        return resid, jac
+
+    @njit(cache=NUMBA_CACHE, nogil=True)
+    def _lm_fit(x, y, p0, lower, upper, tol, max_nfev):
+        """Bounded Levenberg-Marquardt fit of the Gaussian + baseline model
+
+        Solves (JᵀJ + λ·diag(JᵀJ)) step = -Jᵀr with a gain-ratio update of λ.
+        Trial points are clipped to the bounds and parameters pinned at a bound
+        by the gradient are frozen for that step. The baseline is fitted about
+        the ROI centre to decouple b and c. Returns (params, jac, cost, converged).
+        """
+        # Work in x - xm so that the baseline is b*(x - xm) + (c + b*xm)
+        xm = 0.5 * (x[0] + x[-1])
+        xc = x - xm
+        shift = np.zeros(5)
+        shift[1] = xm
+        p = np.minimum(np.maximum(p0, lower), upper) - shift
+        p[4] += p[3] * xm
+        lo = lower - shift
+        hi = upper - shift
+
+        resid, jac = _residual_jac(p, xc, y)
+        cost = np.dot(resid, resid)
+        nfev = 1
+        lam = 0.1
+        nu = 2.0
+        converged = False
+        lhs = np.empty((5, 5))
+        rhs = np.empty(5)
+        while nfev < max_nfev:
+            jtj = jac.T @ jac
+            grad = jac.T @ resid
+            free = np.ones(5, dtype=np.bool_)
+            gmax = 0.0
+            for k in range(5):
+                if (p[k] <= lo[k] and grad[k] > 0.0) or (p[k] >= hi[k] and grad[k] < 0.0):
+                    free[k] = False
+                else:
+                    gmax = max(gmax, abs(grad[k]) * (abs(p[k]) + 1.0))
+            if gmax <= tol * cost:
+                converged = True
+                break
+            for i in range(5):
+                rhs[i] = -grad[i] if free[i] else 0.0
+                for j in range(5):
+                    lhs[i, j] = jtj[i, j] if free[i] and free[j] else 0.0
+                lhs[i, i] = jtj[i, i] + lam * max(jtj[i, i], 1e-12) if free[i] else 1.0
+            step = np.linalg.solve(lhs, rhs)
+            p_new = np.minimum(np.maximum(p + step, lo), hi)
+            step = p_new - p
+            resid_new, jac_new = _residual_jac(p_new, xc, y)
+            cost_new = np.dot(resid_new, resid_new)
+            nfev += 1
+
+            jstep = jac @ step
+            predicted = -2.0 * np.dot(grad, step) - np.dot(jstep, jstep)
+            actual = cost - cost_new
+            if actual > 0.0 and predicted > 0.0:
+                lam *= max(1.0 / 3.0, 1.0 - (2.0 * actual / predicted - 1.0)**3)
+                nu = 2.0
+                p, resid, jac, cost = p_new, resid_new, jac_new, cost_new
+                step_norm = np.sqrt(np.dot(step, step))
+                x_norm = np.sqrt(np.dot(p, p))
+                if actual <= tol * cost and step_norm <= np.sqrt(tol) * (np.sqrt(tol) + x_norm):
+                    converged = True
+                    break
+            else:
+                lam *= nu
+                nu *= 2.0
+                if lam > 1e16:
+                    # No downhill step left: already at the (bounded) minimum
+                    converged = True
+                    break
+
+        # Back to the caller's parametrisation
+        p[4] -= p[3] * xm
+        p += shift
+        jac[:, 3] = x
+        return p, jac, cost, converged
+
+    @vectorize(['float64(float64, float64, float64, float64, float64, float64)'], cache=NUMBA_CACHE)
+    def _gauss_baseline_ufunc(x, a, x0, sigma, b, c):
+        """Gaussian + linear baseline as a compiled ufunc (one fused loop)"""
+        dx = x - x0
+        return a * math.exp(-dx * dx / (2.0 * sigma * sigma)) + b * x + c
+
+    def _warm_up_fit():
+        """Compile (or load from cache) _lm_fit with a tiny dummy fit"""
+        x = np.linspace(-1.0, 1.0, 2 * MIN_FIT_POINTS)
+        y = _gauss_baseline_ufunc(x, 1.0, 0.0, 0.3, 0.0, 0.0)
+        _lm_fit(x, y, np.array([1.0, 0.1, 0.5, 0.0, 0.0]),
+                np.array([0.0, -1.0, 1e-6, -np.inf, -np.inf]),
+                np.array([np.inf, 1.0, 2.0, np.inf, np.inf]), LM_TOL, LM_MAX_NFEV)
+else:
+    _gauss_baseline_ufunc = None
+    _warm_up_fit = None
+
+def _decimate(x, y, n_pixels):
+    """Min/max decimation of a trace with ascending x, for display only
+
+    Splits the trace into ``n_pixels`` buckets and keeps each bucket's minimum
+    and maximum, which is visually lossless at that pixel width.
+    """
+    n = len(x)
+    if n_pixels < 1 or n <= 2 * n_pixels:
+        return x, y
+    starts = np.linspace(0, n, n_pixels + 1).astype(np.intp)
+    x_dec = np.empty(2 * n_pixels, dtype=x.dtype)
+    y_dec = np.empty(2 * n_pixels, dtype=y.dtype)
+    x_dec[0::2] = x[starts[:-1]]
+    x_dec[1::2] = x[starts[1:] - 1]
+    y_dec[0::2] = np.minimum.reduceat(y, starts[:-1])
+    y_dec[1::2] = np.maximum.reduceat(y, starts[:-1])
+    return x_dec, y_dec
+
+def _is_integral(values, limit):
+    """True if all values are whole numbers no larger than limit in magnitude"""
+    return bool(np.all(values == np.rint(values)) and np.all(np.abs(values) <= limit))
+
+def load_spectrum(filename):
+    """Read a whitespace-separated numeric text file into a 2D float array"""
+    if pd is not None:
+        try:
+            frame = pd.read_csv(filename, sep=r'\s+', header=None, comment='#',
+                                engine='c', dtype=np.float64)
+            data = frame.to_numpy()
+            # read_csv pads short (ragged) rows with NaN; leave those files to np.loadtxt,
+            # which rejects them as it always has
+            if not np.isnan(data).any():
+                return data
+        except (ValueError, pd.errors.ParserError):
+            pass  # Let np.loadtxt parse it (or report the problem in its usual terms)
+    return np.loadtxt(filename, ndmin=2)
+
 class Dataset:
     """Class to store dataset information"""
     def __init__(self, filename=None, raw_data=None):
         self.filename = filename
-        self.raw_data = raw_data          # [channel, counts]
-        self.adjusted_data = None         # [energy, counts]
+        # Columns are kept as separate contiguous arrays (structure of arrays)
+        self.channels = None              # Channel axis (float32 for integer channels, else float64)
+        self.counts = None                # Counts (int32 when integral, else float64)
+        self.energy = None                # Energy axis (float64), allocated on calibration
+        self.calib_key = None             # (a, b, c) the energy axis was computed with
         self.fit_results = []             # Peak fitting results
         self.selected_regions = []        # ROI storage
         self.x_axis_adjusted = False      # Flag if calibration was applied
+        self.x_sorted = None              # Cached "x is ascending" check (None = unknown)
+        self.sorted_xy = None             # (x, counts) in ascending x order, built once per axis
+        self.fit_xy = None                # sorted_xy as contiguous float64, for fitting
+        self.xy_buffer = None             # Persistent (N, 2) [x, counts] buffer behind adjusted_data
+        self.xy_buffer_key = None         # Axis the buffer's x column was written for
+        self.trace_cache = None           # (key, (x, y)) last decimated display trace
         
-        # Copy data as adjusted on init
         if raw_data is not None:
-            self.adjusted_data = np.copy(raw_data)
+            # Narrow dtypes only where they are exact: converted files already carry
+            # keV (or non-integral counts) in these columns, which must stay float64
+            channels, counts = raw_data[:, 0], raw_data[:, 1]
+            self.channels = np.ascontiguousarray(
+                channels, dtype=np.float32 if _is_integral(channels, 2**24) else np.float64)
+            self.counts = np.ascontiguousarray(
+                counts, dtype=np.int32 if _is_integral(counts, np.iinfo(np.int32).max) else np.float64)
+
+    @property
+    def x(self):
+        """Current x axis: energy once calibrated, channels until then"""
+        return self.energy if self.x_axis_adjusted else self.channels
+
+    def apply_calibration(self, a, b, c):
+        """Set the energy axis to E = a*Ch² + b*Ch + c, reusing the energy buffer
+
+        Re-applying the coefficients already in use keeps the current axis.
+        """
+        if self.x_axis_adjusted and self.calib_key == (a, b, c):
+            return
+        if self.energy is None or self.energy.shape != self.channels.shape:
+            self.energy = np.empty(self.channels.shape)
+        if ne is not None:
+            ne.evaluate(CALIBRATION_EXPR, out=self.energy, local_dict={
+                'ch': self.channels, 'a': a, 'b': b, 'c': c})
+        else:
+            # Horner's scheme in place: no temporaries, one pass per operation
+            np.multiply(self.channels, a, out=self.energy, dtype=np.float64)
+            self.energy += b
+            self.energy *= self.channels
+            self.energy += c
+        self.calib_key = (a, b, c)
+        self.x_axis_adjusted = True
+        self.x_sorted = None
+        self.sorted_xy = None
+        self.fit_xy = None
+
+    def is_sorted(self):
+        """Whether the current x axis is ascending (checked once per axis)"""
+        if self.x_sorted is None:
+            x = self.x
+            self.x_sorted = bool(np.all(x[1:] >= x[:-1]))
+        return self.x_sorted
+
+    def sorted_data(self):
+        """(x, counts) in ascending x order: the arrays themselves when already sorted
+
+        A calibration that is not monotonic over the channel range is sorted
+        once here, so ROI lookups stay binary searches instead of masks.
+        """
+        if self.sorted_xy is None:
+            if self.is_sorted():
+                self.sorted_xy = (self.x, self.counts)
+            else:
+                order = np.argsort(self.x, kind='stable')
+                self.sorted_xy = (self.x[order], self.counts[order])
+        return self.sorted_xy
+
+    def fit_data(self):
+        """sorted_data() as contiguous float64 arrays, converted once per axis"""
+        if self.fit_xy is None:
+            self.fit_xy = tuple(np.ascontiguousarray(column, dtype=np.float64)
+                                for column in self.sorted_data())
+        return self.fit_xy
+
+    def roi_indices(self, x_min, x_max):
+        """(start, stop) indices into sorted_data() of x values in [x_min, x_max]
+
+        Also accepts arrays of bounds, returning lists of starts and stops.
+        """
+        x = self.sorted_data()[0]
+        return (np.searchsorted(x, x_min, side='left').tolist(),
+                np.searchsorted(x, x_max, side='right').tolist())
+
+    @property
+    def raw_data(self):
+        """[channel, counts] as an (N, 2) array, built on demand"""
+        if self.channels is None:
+            return None
+        data = np.empty((len(self.channels), 2))
+        data[:, 0] = self.channels
+        data[:, 1] = self.counts
+        return data
+
+    @property
+    def adjusted_data(self):
+        """[energy, counts] as an (N, 2) array, built on demand
+
+        Falls back to raw_data until a calibration has been applied. The
+        array is a buffer reused across calls: counts are written once and
+        the x column only when the axis changes. Copy it before modifying.
+        """
+        if self.channels is None:
+            return None
+        if self.xy_buffer is None:
+            self.xy_buffer = np.empty((len(self.channels), 2))
+            self.xy_buffer[:, 1] = self.counts
+        key = (self.x_axis_adjusted, self.calib_key)
+        if self.xy_buffer_key != key:
+            self.xy_buffer[:, 0] = self.x
+            self.xy_buffer_key = key
+        return self.xy_buffer
 
     @property
     def name(self):
@@ -40,6 +347,132 @@ class Dataset:
             return os.path.basename(self.filename)
         return "Unnamed Dataset"
 
+class LoaderSignals(QObject):
+    """Signals emitted by LoaderTask (QRunnable itself cannot emit)"""
+    loaded = pyqtSignal(Dataset, bool)  # dataset, trailer row removed
+    failed = pyqtSignal(str)
+
+class LoaderTask(QRunnable):
+    """Read a data file on a QThreadPool worker so the GUI stays responsive"""
+    def __init__(self, filename, skip_last_row):
+        super().__init__()
+        self.filename = filename
+        self.skip_last_row = skip_last_row
+        self.signals = LoaderSignals()
+
+    def run(self):
+        try:
+            raw_data = load_spectrum(self.filename)
+            if raw_data.ndim != 2 or raw_data.shape[1] < 2:
+                raise ValueError("Data requires at least 2 columns")
+            
+            # SSRF exports may include a non-data trailer row; keep this user-controllable.
+            trimmed = self.skip_last_row and len(raw_data) > 0
+            if trimmed:
+                raw_data = raw_data[:-1]
+            if len(raw_data) == 0:
+                raise ValueError("File contains no data rows")
+            if not np.isfinite(raw_data[:, :2]).all():
+                raise ValueError("File contains missing or non-numeric values")
+            
+            self.signals.loaded.emit(Dataset(filename=self.filename, raw_data=raw_data), trimmed)
+        except Exception as e:
+            self.signals.failed.emit(str(e))
+
+class FitSignals(QObject):
+    """Signals emitted by FitTask (QRunnable itself cannot emit)"""
+    fitted = pyqtSignal(object, object)  # roi, fit result
+    finished = pyqtSignal()
+
+class FitTask(QRunnable):
+    """Fit a batch of ROIs on a QThreadPool worker, reporting each result as it is ready"""
+    def __init__(self, fit_roi, jobs):
+        super().__init__()
+        self.fit_roi = fit_roi  # fit_roi(roi, x, y, p0, bounds) -> fit result dict
+        self.jobs = jobs        # [(roi, x, y, p0, bounds), ...] in ROI order
+        self.signals = FitSignals()
+
+    def run(self):
+        try:
+            for job in self.jobs:
+                self.signals.fitted.emit(job[0], self.fit_roi(*job))
+        finally:
+            self.signals.finished.emit()
+
+class FitResultsModel(QAbstractTableModel):
+    """Table model over a Dataset's ROIs and fit results (no per-cell items)"""
+    HEADERS = ["ROI", "Center (keV)", "FWHM (keV)", "Intensity", "R²"]
+    
+    # Text brushes, picked per row from the ROI colour brightness
+    TEXT_BLACK = QBrush(Qt.black)
+    TEXT_WHITE = QBrush(Qt.white)
+    
+    def __init__(self, font, parent=None):
+        super().__init__(parent)
+        self.font = QFont(font)
+        self.font.setBold(True)
+        self.dataset = None
+        self.row_brushes = []  # (background, text) per row
+        
+    @staticmethod
+    @lru_cache(maxsize=256)
+    def region_brushes(color):
+        """(background, text) brushes for an ROI colour; the text contrasts with it
+
+        Memoised by colour string: ROIs cycle through a small palette, so the
+        brushes are built once per colour and shared.
+        """
+        bg_color = QColor(color)
+        brightness = (bg_color.red() * 299 + bg_color.green() * 587 + bg_color.blue() * 114) / 1000
+        return (QBrush(bg_color),
+                FitResultsModel.TEXT_BLACK if brightness > 128 else FitResultsModel.TEXT_WHITE)
+        
+    def set_dataset(self, dataset):
+        """Show dataset's results (None for an empty table) and refresh the view"""
+        self.beginResetModel()
+        self.dataset = dataset
+        self.row_brushes = []
+        if dataset is not None:
+            for region, _ in zip(dataset.selected_regions, dataset.fit_results):
+                # Background colour matches plot, text colour depends on background;
+                # normally built with the ROI, only regions made elsewhere need it here
+                if 'brushes' not in region:
+                    region['brushes'] = self.region_brushes(region['color'])
+                self.row_brushes.append(region['brushes'])
+        self.endResetModel()
+        
+    def rowCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.row_brushes)
+        
+    def columnCount(self, parent=QModelIndex()):
+        return 0 if parent.isValid() else len(self.HEADERS)
+        
+    def data(self, index, role=Qt.DisplayRole):
+        row, col = index.row(), index.column()
+        if not index.isValid() or row >= len(self.row_brushes):
+            return None
+        if role == Qt.DisplayRole:
+            if row >= len(self.dataset.fit_results):  # Results cleared by a refit in progress
+                return None
+            region = self.dataset.selected_regions[row]
+            result = self.dataset.fit_results[row]
+            if col == 0:
+                return f"ROI {row+1} ({region['x_min']:.2f}-{region['x_max']:.2f} keV)"
+            value = (result['params'][1], result['fwhm'], result['integral'], result['r_squared'])[col - 1]
+            return f"{value:.5f}"
+        if role == Qt.BackgroundRole:
+            return self.row_brushes[row][0]
+        if role == Qt.ForegroundRole:
+            return self.row_brushes[row][1]
+        if role == Qt.FontRole:
+            return self.font
+        return None
+        
+    def headerData(self, section, orientation, role=Qt.DisplayRole):
+        if role == Qt.DisplayRole and orientation == Qt.Horizontal:
+            return self.HEADERS[section]
+        return super().headerData(section, orientation, role)
+
 class XRDDataAnalyzer(QMainWindow):
     # 样式常量
     BUTTON_STYLE_TPL = """
@@ -134,6 +567,31 @@ class XRDDataAnalyzer(QMainWindow):
         # UI interaction state
         self.region_selection_active = False
         self.current_roi = None
+        self._drag_rect = None  # Selection box shown while dragging an ROI, reused between drags
+        
+        # Plot blitting state: ROI overlay artists and the canvas cached without them
+        self._overlay_artists = []
+        # Overlay artists by dataset, then ROI/box group: id(dataset) -> {key: (content, artists)}
+        self._roi_artists = {}
+        self._background = None
+        self._capture_background = False  # Next draw_event caches the background
+        self._background_view = None  # Axes view limits the background was drawn with
+        self._raw_line = None             # Spectrum line, reused across replots
+        self._legend = None               # Legend, rebuilt only when its entries change
+        self._legend_key = None
+        self._legend_proxies = {}         # Legend swatch per ROI colour, shared by regions
+        self._plot_pending = False        # A plot_data update is queued (see plot_data)
+        
+        # Background file import and peak fit in progress (see import_data, fit_peaks)
+        self._loader_task = None
+        self._fit_task = None
+        self._fit_batch = []  # (roi, result) pairs delivered by the running FitTask
+        
+        # Splitter and column resizes are saved once the drag settles, and only
+        # for the splitters/headers that moved
+        self._layout_save_timer = QTimer(self, singleShot=True, interval=300)
+        self._layout_save_timer.timeout.connect(self.flush_layout_state)
+        self._layout_dirty = set()
         
         # Initialize UI
         self.init_ui()
@@ -142,6 +600,13 @@ class XRDDataAnalyzer(QMainWindow):
         # Restore saved values
         self.restore_saved_values()
         
+        # JIT the compiled fit in the background so the first Fit click does not wait
+        # for it; a pool of its own keeps imports on the global pool from queueing
+        if _warm_up_fit is not None:
+            self._warm_up_pool = QThreadPool(self)
+            self._warm_up_pool.setMaxThreadCount(1)
+            self._warm_up_pool.start(_warm_up_fit)
+        
     @property
     def current_dataset(self):
         """Get current active dataset or None"""
@@ -238,7 +703,6 @@ class XRDDataAnalyzer(QMainWindow):
         # 设置固定垂直大小策略，保持高度不变
         data_group.setSizePolicy(QSizePolicy.Preferred, QSizePolicy.Fixed)
         # 使用初始化后的sizeHint设置最大高度
-        from PyQt5.QtCore import QTimer
         QTimer.singleShot(0, lambda: data_group.setMaximumHeight(data_group.sizeHint().height()))
         
         # Dataset selector
@@ -303,6 +767,7 @@ class XRDDataAnalyzer(QMainWindow):
             label.setStyleSheet("QLabel { font-weight: bold; }")
             edit = QLineEdit(val)
             edit.setObjectName(f"{name}_edit")
+            setattr(self, f"{name}_edit", edit)  # self.a_edit etc., no findChild lookups later
             edit.setValidator(QDoubleValidator(-100, 100, 8))
             edit.setStyleSheet("""
                 QLineEdit {
@@ -337,6 +802,7 @@ class XRDDataAnalyzer(QMainWindow):
         # Main workspace
         splitter = QSplitter(Qt.Horizontal)
         splitter.setObjectName("mainSplitter")  # Set name for saving state
+        self.main_splitter = splitter
         
         # Left control panel (40% width)
         left_panel = QWidget()
@@ -431,25 +897,13 @@ class XRDDataAnalyzer(QMainWindow):
         # 确保表格中输入的内容也使用Arial字体
         self.calib_table.setStyleSheet("QTableWidget { font-family: Arial; font-size: 10pt; }")
         self.calib_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
-        # Set default MgO values
-        self.calib_table.setItem(0, 0, QTableWidgetItem("2.1065"))
-        self.calib_table.setItem(0, 2, QTableWidgetItem("MgO_200"))
-        self.calib_table.setItem(1, 0, QTableWidgetItem("1.4895"))
-        self.calib_table.setItem(1, 2, QTableWidgetItem("MgO_220"))
-        
-        # Restore column widths if available
-        if self.settings.contains("calibTable/columnWidths"):
-            widths = self.settings.value("calibTable/columnWidths")
-            for col, width in enumerate(widths):
-                self.calib_table.setColumnWidth(col, int(width))
-        else:
-            # Set default widths
-            self.calib_table.setColumnWidth(0, 120)  # d (Å)
-            self.calib_table.setColumnWidth(1, 100)  # E (keV)
-            self.calib_table.setColumnWidth(2, 200)  # Remarks
+        # Cells are filled by restore_saved_values (saved rows or the MgO defaults)
+        
+        # Restore column widths if available, else defaults: d (Å), E (keV), Remarks
+        self.restore_column_widths(self.calib_table, "calibTable", [120, 100, 200])
         
         # Save column widths when changed
-        self.calib_table.horizontalHeader().sectionResized.connect(self.save_calib_column_widths)
+        self.calib_table.horizontalHeader().sectionResized.connect(self.schedule_layout_save)
         
         self.calib_table.setStyleSheet(self.TABLE_STYLE.format(self.UI_COLORS['theta'][0]))
         
@@ -480,9 +934,9 @@ class XRDDataAnalyzer(QMainWindow):
         # Right display area with vertical splitter
         right_splitter = QSplitter(Qt.Vertical)
         right_splitter.setObjectName("rightSplitter")  # Set name for saving state
+        self.right_splitter = right_splitter
         
         # Use timer to restore splitter states after UI is fully initialized
-        from PyQt5.QtCore import QTimer
         QTimer.singleShot(100, lambda: self.restore_splitter_states(splitter, right_splitter))
         
         # Plot area
@@ -509,42 +963,33 @@ class XRDDataAnalyzer(QMainWindow):
         results_layout = QVBoxLayout(results_widget)
         results_layout.setContentsMargins(0, 0, 0, 0)
         
-        self.result_table = QTableWidget(0, 5)  # Start with 0 rows
-        self.result_table.setHorizontalHeaderLabels([
-            "ROI", "Center (keV)", "FWHM (keV)", "Intensity", "R²"
-        ])
+        # Results are shown through a model backed by the current dataset
+        self.result_table = QTableView()
         # Set table font and resize policy
         font = QFont("Arial", 10)
         self.result_table.setFont(font)
+        self.result_model = FitResultsModel(font, self)
+        self.result_table.setModel(self.result_model)
         header_font = QFont("Arial", 10)
         header_font.setBold(True)
         self.result_table.horizontalHeader().setFont(header_font)
         self.result_table.verticalHeader().setFont(font)
         # 确保结果表格中的内容也使用Arial字体
-        self.result_table.setStyleSheet("QTableWidget { font-family: Arial; font-size: 10pt; }")
+        self.result_table.setStyleSheet("QTableView { font-family: Arial; font-size: 10pt; }")
         self.result_table.horizontalHeader().setSectionResizeMode(QHeaderView.Stretch)
         self.result_table.verticalHeader().setVisible(False)
-        self.result_table.setSizeAdjustPolicy(QTableWidget.AdjustToContents)
+        # Uniform row height: the view never queries per-row size hints
+        self.result_table.verticalHeader().setSectionResizeMode(QHeaderView.Fixed)
+        self.result_table.setSizeAdjustPolicy(QTableView.AdjustToContents)
         
         # Disable auto-stretch to allow manual column resize
         self.result_table.horizontalHeader().setSectionResizeMode(QHeaderView.Interactive)
         
-        # Restore column widths if available
-        if self.settings.contains("resultTable/columnWidths"):
-            widths = self.settings.value("resultTable/columnWidths")
-            for col, width in enumerate(widths):
-                if col < self.result_table.columnCount():
-                    self.result_table.setColumnWidth(col, int(width))
-        else:
-            # Set default widths
-            self.result_table.setColumnWidth(0, 200)  # ROI
-            self.result_table.setColumnWidth(1, 120)  # Center
-            self.result_table.setColumnWidth(2, 120)  # FWHM
-            self.result_table.setColumnWidth(3, 120)  # Intensity
-            self.result_table.setColumnWidth(4, 80)   # R²
+        # Restore column widths if available, else defaults: ROI, Center, FWHM, Intensity, R²
+        self.restore_column_widths(self.result_table, "resultTable", [200, 120, 120, 120, 80])
         
         # Save column widths when changed
-        self.result_table.horizontalHeader().sectionResized.connect(self.save_column_widths)
+        self.result_table.horizontalHeader().sectionResized.connect(self.schedule_layout_save)
         
         # Add table to scroll area to ensure scrollability when needed
         scroll_area = QScrollArea()
@@ -571,7 +1016,7 @@ class XRDDataAnalyzer(QMainWindow):
         splitter.setStretchFactor(0, 1)  # Left panel
         splitter.setStretchFactor(1, 3)  # Right panel
         splitter.setSizes([int(self.width()*0.3), int(self.width()*0.7)])  # Left 30%, Right 70%
-        splitter.splitterMoved.connect(lambda: self.settings.setValue("mainSplitter", splitter.saveState()))
+        splitter.splitterMoved.connect(self.schedule_layout_save)
         
         # Configure right splitter
         right_splitter.setHandleWidth(8)
@@ -586,14 +1031,14 @@ class XRDDataAnalyzer(QMainWindow):
         right_splitter.setStretchFactor(0, 2)  # Plot area
         right_splitter.setStretchFactor(1, 1)  # Results area
         right_splitter.setSizes([500, 400])  # Initial sizes (55%/45%)
-        right_splitter.splitterMoved.connect(lambda: self.settings.setValue("rightSplitter", right_splitter.saveState()))
+        right_splitter.splitterMoved.connect(self.schedule_layout_save)
         
         main_layout.addWidget(splitter)
         
         # Set size policy for resizing
         self.result_table.setSizePolicy(QSizePolicy.Expanding, QSizePolicy.Expanding)
         self.result_table.verticalHeader().setDefaultSectionSize(24)  # Compact row height
-        self.result_table.setVerticalScrollMode(QTableWidget.ScrollPerPixel)
+        self.result_table.setVerticalScrollMode(QTableView.ScrollPerPixel)
         
         # Set contributor info in status bar
         # Set status bar style
@@ -616,6 +1061,9 @@ class XRDDataAnalyzer(QMainWindow):
         self.canvas.mpl_connect('button_press_event', self.on_press)
         self.canvas.mpl_connect('motion_notify_event', self.on_motion)
         self.canvas.mpl_connect('button_release_event', self.on_release)
+        self.canvas.mpl_connect('draw_event', self.on_canvas_draw)
+        self.canvas.mpl_connect('resize_event', self.on_canvas_resize)
+        self.ax.callbacks.connect('xlim_changed', self.on_xlim_changed)
 
     def on_dataset_changed(self, index):
         """Handle dataset selection change"""
@@ -632,135 +1080,271 @@ class XRDDataAnalyzer(QMainWindow):
         
     def update_dataset_selector(self):
         """Update dataset selector with current datasets"""
-        # Block signals to prevent triggering change events during update
+        # Block signals to prevent triggering change events during update, and
+        # repaints until the list is rebuilt
         self.dataset_selector.blockSignals(True)
+        self.dataset_selector.setUpdatesEnabled(False)
         self.dataset_selector.clear()
         
-        for idx, dataset in enumerate(self.datasets):
-            self.dataset_selector.addItem(dataset.name if dataset else f"Dataset {idx+1}")
+        # Add all names in one call rather than one item at a time
+        self.dataset_selector.addItems([
+            dataset.name if dataset else f"Dataset {idx+1}" for idx, dataset in enumerate(self.datasets)])
         
         # Select current dataset
         if 0 <= self.current_dataset_index < self.dataset_selector.count():
             self.dataset_selector.setCurrentIndex(self.current_dataset_index)
             
+        self.dataset_selector.setUpdatesEnabled(True)
         self.dataset_selector.blockSignals(False)
         
         # Update controls based on whether we have data
         has_data = len(self.datasets) > 0
         self.select_btn.setEnabled(has_data)
-        self.fit_btn.setEnabled(has_data)
+        self.fit_btn.setEnabled(has_data and self._fit_task is None)
         self.adjust_btn.setEnabled(has_data)
         self.export_btn.setEnabled(has_data)
         
     def update_result_table(self):
         """Update result table with current dataset's fit results"""
-        self.result_table.setRowCount(0)
-        
-        dataset = self.current_dataset
-        if not dataset or not dataset.fit_results:
-            return
-            
-        regions = dataset.selected_regions
-        results = dataset.fit_results
-        
-        self.result_table.setRowCount(len(results))
-        for idx, (region, result) in enumerate(zip(regions, results)):
-            for col, val in enumerate([
-                f"ROI {idx+1} ({region['x_min']:.2f}-{region['x_max']:.2f} keV)",
-                f"{result['params'][1]:.5f}",
-                f"{result['fwhm']:.5f}",
-                f"{result['integral']:.5f}",
-                f"{result['r_squared']:.5f}"
-            ]):
-                item = QTableWidgetItem(val)
-                # Set ROI row style - background color matches plot, text color depends on background
-                item.setBackground(QColor(region['color']))
-                # Calculate background brightness to determine text color
-                bg_color = QColor(region['color'])
-                brightness = (bg_color.red() * 299 + bg_color.green() * 587 + bg_color.blue() * 114) / 1000
-                text_color = QColor(Qt.black) if brightness > 128 else QColor(Qt.white)
-                item.setForeground(text_color)
-                font = item.font()
-                font.setBold(True)
-                item.setFont(font)
-                
-                # For other columns, set text color based on background
-                if col > 0:
-                    item.setForeground(text_color)
-                
-                # Ensure text remains visible when selected
-                item.setData(Qt.BackgroundRole, QColor(region['color']))
-                item.setData(Qt.ForegroundRole, text_color)
-                
-                self.result_table.setItem(idx, col, item)
+        self.result_model.set_dataset(self.current_dataset)
 
+    def schedule_layout_save(self, *args):
+        """Note the resized splitter/header and restart the debounce timer"""
+        self._layout_dirty.add(self.sender())
+        self._layout_save_timer.start()
+        
+    def flush_layout_state(self):
+        """Save only the splitters and column widths changed since the last save"""
+        dirty, self._layout_dirty = self._layout_dirty, set()
+        for source in dirty:
+            if isinstance(source, QSplitter):
+                self.settings.setValue(source.objectName(), source.saveState())
+            elif source is self.result_table.horizontalHeader():
+                self.save_column_widths()
+            elif source is self.calib_table.horizontalHeader():
+                self.save_calib_column_widths()
+        
+    def save_layout_state(self):
+        """Save splitter positions and column widths to settings"""
+        self._layout_save_timer.stop()
+        self._layout_dirty.clear()
+        for splitter in (self.main_splitter, self.right_splitter):
+            self.settings.setValue(splitter.objectName(), splitter.saveState())
+            
+        self.save_column_widths()
+        self.save_calib_column_widths()
+        
     def save_column_widths(self):
         """Save result table column widths to settings"""
-        widths = [self.result_table.columnWidth(i) for i in range(self.result_table.columnCount())]
-        self.settings.setValue("resultTable/columnWidths", widths)
+        self.settings.setValue("resultTable/headerState", self.result_table.horizontalHeader().saveState())
         
     def save_calib_column_widths(self):
         """Save calibration table column widths to settings"""
-        widths = [self.calib_table.columnWidth(i) for i in range(self.calib_table.columnCount())]
-        self.settings.setValue("calibTable/columnWidths", widths)
+        self.settings.setValue("calibTable/headerState", self.calib_table.horizontalHeader().saveState())
+        
+    def restore_column_widths(self, table, name, default_widths):
+        """Restore a table's column widths from settings in one header restore
+
+        Falls back to the per-column width list written by older versions, then
+        to default_widths.
+        """
+        header = table.horizontalHeader()
+        state = self.settings.value(f"{name}/headerState")
+        if state is not None and header.restoreState(state):
+            return
+        widths = self.settings.value(f"{name}/columnWidths") or default_widths
+        for col, width in enumerate(widths[:header.count()]):
+            table.setColumnWidth(col, int(width))
         
     def restore_saved_values(self):
         """Restore saved values from settings"""
-        # Restore energy calibration parameters (a, b, c)
-        if self.settings.contains("energy_calib/a"):
-            a = self.settings.value("energy_calib/a")
-            self.findChild(QLineEdit, "a_edit").setText(a)
-        
-        if self.settings.contains("energy_calib/b"):
-            b = self.settings.value("energy_calib/b")
-            self.findChild(QLineEdit, "b_edit").setText(b)
-            
-        if self.settings.contains("energy_calib/c"):
-            c = self.settings.value("energy_calib/c")
-            self.findChild(QLineEdit, "c_edit").setText(c)
+        # Restore energy calibration parameters (a, b, c), listing the group's keys once
+        self.settings.beginGroup("energy_calib")
+        saved_calib = {key: self.settings.value(key) for key in self.settings.childKeys()}
+        self.settings.endGroup()
+        for key in ("a", "b", "c"):
+            if key in saved_calib:
+                getattr(self, f"{key}_edit").setText(saved_calib[key])
             
         # Restore calibration table data
-        if self.settings.contains("calib_table/data"):
-            # Clear default values first
-            for row in range(self.calib_table.rowCount()):
-                for col in range(self.calib_table.columnCount()):
-                    self.calib_table.setItem(row, col, QTableWidgetItem(""))
-                    
-            # Fill with saved values
-            calib_data = self.settings.value("calib_table/data")
-            if calib_data:
-                for i, row_data in enumerate(calib_data):
-                    if i >= self.calib_table.rowCount():
-                        break
-                        
-                    if 'd' in row_data:
-                        self.calib_table.setItem(i, 0, QTableWidgetItem(row_data['d']))
-                    if 'e' in row_data:
-                        self.calib_table.setItem(i, 1, QTableWidgetItem(row_data['e']))
-                    if 'remarks' in row_data:
-                        self.calib_table.setItem(i, 2, QTableWidgetItem(row_data['remarks']))
+        self.settings.beginGroup("calib_table")
+        has_calib_data = "data" in self.settings.childKeys()
+        calib_data = self.settings.value("data") if has_calib_data else None
+        self.settings.endGroup()
+        if has_calib_data:
+            # Flatten saved rows into (row, col, text) cells, skipping empty values
+            rows = calib_data[:self.calib_table.rowCount()] if calib_data else []
+            cells = [(i, col, row_data[key])
+                     for i, row_data in enumerate(rows)
+                     for col, key in enumerate(('d', 'e', 'remarks'))
+                     if row_data.get(key)]
+        else:
+            # Default MgO values
+            cells = [(0, 0, "2.1065"), (0, 2, "MgO_200"), (1, 0, "1.4895"), (1, 2, "MgO_220")]
+        
+        # The table starts empty, so only the non-empty cells are written
+        self.calib_table.setUpdatesEnabled(False)
+        self.calib_table.blockSignals(True)
+        try:
+            for row, col, text in cells:
+                self.calib_table.setItem(row, col, QTableWidgetItem(text))
+        finally:
+            self.calib_table.blockSignals(False)
+            self.calib_table.setUpdatesEnabled(True)
     
-    def gaussian_with_baseline(self, x, a, x0, sigma, b, c):
-        """Gaussian function with linear baseline"""
-        return a * np.exp(-(x - x0)**2 / (2 * sigma**2)) + b * x + c
+    def gaussian_with_baseline(self, x, a, x0, sigma, b, c, out=None):
+        """Gaussian function with linear baseline
+
+        ``out`` (float64, same shape as x) receives the result instead of a
+        new array; never pass a buffer that curve_fit still holds.
+        """
+        if _gauss_baseline_ufunc is not None:
+            return _gauss_baseline_ufunc(x, a, x0, sigma, b, c, out=out)
+        if ne is not None:
+            return ne.evaluate(GAUSS_BASELINE_EXPR, out=out, local_dict={
+                'x': x, 'a': a, 'x0': x0, 'sigma': sigma, 'b': b, 'c': c})
+        if out is None and len(x) <= INPLACE_MIN_POINTS:
+            return a * np.exp(-(x - x0)**2 / (2 * sigma**2)) + b * x + c
+        
+        # Same expression evaluated in place, with b*x as the only temporary
+        if out is None:
+            out = np.empty(np.shape(x))
+        np.subtract(x, x0, out=out)
+        np.square(out, out=out)
+        out *= -1 / (2 * sigma**2)
+        np.exp(out, out=out)
+        out *= a
+        out += b * x
+        out += c
+        return out
+
+    def _gauss_jac(self, x, a, x0, sigma, b, c, dx=None, g=None):
+        """Analytic Jacobian of gaussian_with_baseline, shape (N, 5)
+
+        Columns are d/da, d/dx0, d/dsigma, d/db, d/dc. ``dx`` (x - x0) and
+        ``g`` (the Gaussian exp term) may be passed in when already computed.
+        """
+        if dx is None:
+            dx = x - x0
+        if g is None:
+            g = np.exp(-dx**2 / (2 * sigma**2))
+        jac = np.empty((len(x), 5))
+        jac[:, 0] = g
+        # d/dx0 = a*g*dx/sigma², d/dsigma = d/dx0 * dx/sigma, written straight into the columns
+        np.multiply(g, a / sigma**2, out=jac[:, 1])
+        jac[:, 1] *= dx
+        np.multiply(jac[:, 1], dx, out=jac[:, 2])
+        jac[:, 2] /= sigma
+        jac[:, 3] = x
+        jac[:, 4] = 1.0
+        return jac
+
+    def _fit_gaussian(self, x, y, p0, bounds):
+        """Fit gaussian_with_baseline to (x, y), returning (popt, pcov)
+
+        Uses the compiled LM solver when numba is available and falls back to
+        curve_fit when it is not, when the compiled fit does not converge or
+        when it stops with a parameter on a bound.
+        """
+        # fit_peaks passes float64 already; this only copies for other callers
+        x = np.ascontiguousarray(x, dtype=np.float64)
+        y = np.ascontiguousarray(y, dtype=np.float64)
+        if njit is not None:
+            lower, upper = (np.asarray(bound, dtype=np.float64) for bound in bounds)
+            try:
+                popt, jac, cost, converged = _lm_fit(
+                    x, y, np.asarray(p0, dtype=np.float64), lower, upper,
+                    LM_TOL, LM_MAX_NFEV)
+            except Exception as e:
+                print(f"Compiled fit error, using curve_fit: {str(e)}")
+                converged = False
+            # A parameter left on a bound (typically a = 0, where x0 and sigma have
+            # no gradient) is a degenerate stop, not a fit; let curve_fit retry
+            if converged and not (np.any(popt <= lower) or np.any(popt >= upper)):
+                # Same covariance scaling as curve_fit (absolute_sigma=False)
+                dof = max(len(x) - len(popt), 1)
+                pcov = np.linalg.pinv(jac.T @ jac) * (cost / dof)
+                return popt, pcov
+
+        # Imported on first use so startup does not pay for scipy
+        from scipy.optimize import curve_fit
+        model, jac = self._gauss_fit_functions(x)
+        return curve_fit(model, x, y, p0=p0, bounds=bounds,
+                         jac=jac, check_finite=False,
+                         xtol=LM_TOL, ftol=LM_TOL, maxfev=LM_MAX_NFEV)
+
+    def _gauss_fit_functions(self, x):
+        """Build model/Jacobian closures for curve_fit on a fixed x grid
+
+        Both closures share the last (x - x0) and exp term, so the Jacobian at
+        an accepted step reuses the work of the model call that preceded it.
+        """
+        cache = {'key': None}
+
+        def terms(x0, sigma):
+            if cache['key'] != (x0, sigma):
+                # Fresh arrays per step (the solver keeps earlier results), built in place
+                dx = np.subtract(x, x0, dtype=np.float64)
+                g = np.square(dx)
+                g *= -1 / (2 * sigma**2)
+                np.exp(g, out=g)
+                cache['key'] = (x0, sigma)
+                cache['dx'] = dx
+                cache['g'] = g
+            return cache['dx'], cache['g']
+
+        def model(_, a, x0, sigma, b, c):
+            _, g = terms(x0, sigma)
+            y = np.multiply(g, a)
+            y += b * x
+            y += c
+            return y
+
+        def jac(_, a, x0, sigma, b, c):
+            dx, g = terms(x0, sigma)
+            return self._gauss_jac(x, a, x0, sigma, b, c, dx=dx, g=g)
+
+        return model, jac
         
     def plot_data(self):
-        """Update plot with compact layout and ROI-based legend"""
-        self.ax.clear()
+        """Schedule a plot update; repeated calls within one event-loop pass run it once"""
+        self._background = None  # Stale until the replot has run
+        if not self._plot_pending:
+            self._plot_pending = True
+            QTimer.singleShot(0, self._do_plot_data)
+        
+    def _do_plot_data(self):
+        """Update plot with compact layout and ROI-based legend
+
+        The spectrum line and legend are kept between calls and only updated;
+        the ROI overlay is rebuilt, reusing each dataset's ROI artists.
+        """
+        self._plot_pending = False
+        self.release_overlay()
         
         # Get current dataset
         dataset = self.current_dataset
-        if not dataset:
-            self.canvas.draw()
-            return
-            
-        # Determine data source
-        data = dataset.adjusted_data if dataset.x_axis_adjusted else dataset.raw_data
-        if data is None:
+        if not dataset or dataset.x is None:
+            self.clear_overlay()
+            if self._raw_line is not None:
+                self._raw_line.remove()
+                self._raw_line = None
+            self.remove_legend()
+            self.canvas.draw_idle()
             return
         
-        # Plot raw data
-        self.ax.plot(data[:,0], data[:,1], 'k-', lw=1, label='Raw data')
+        # Plot raw data, decimated to the axes width for display
+        trace = self.raw_trace(dataset)
+        if self._raw_line is None:
+            self._raw_line, = self.ax.plot(*trace, 'k-', lw=1, label='Raw data')
+        else:
+            self._raw_line.set_data(*trace)
+        
+        # Rescale to the new data, as a freshly cleared axes would (the hidden
+        # selection box must not count)
+        self.ax.relim(visible_only=True)
+        self.ax.set_autoscale_on(True)
+        self.ax.autoscale_view()
         
         # Get current Y limits if we don't have stored ones
         if not hasattr(self, '_y_limits'):
@@ -774,14 +1358,82 @@ class XRDDataAnalyzer(QMainWindow):
         # Explicitly set Y limits to ensure consistency
         self.ax.set_ylim(y_min, y_max)
         
+        # Set axis labels and tick labels
+        self.ax.set_xlabel('Energy (keV)' if dataset.x_axis_adjusted else 'Channel', fontname='Arial', fontsize=10)
+        self.ax.set_ylabel('Intensity', fontname='Arial', fontsize=10)
+        self.ax.tick_params(axis='both', which='major', labelsize=10)
+        
+        self.add_roi_overlay(dataset)
+        
+        # 应用tight_layout并刷新画布
+        self.figure.tight_layout()
+        self.draw_background()
+        
+    def raw_trace(self, dataset, x_min=None, x_max=None):
+        """Raw spectrum points to draw for the given x range (whole axis by default)"""
+        x_data, y_data = dataset.x, dataset.counts
+        if x_min is None:
+            x_min, x_max = x_data.min(), x_data.max()
+        if not dataset.is_sorted():
+            return x_data, y_data  # Unsorted axis: draw everything, in channel order
+        indices = dataset.roi_indices(x_min, x_max)
+        # Keep one point beyond each edge so the line runs off the axes
+        i0 = max(indices[0] - 1, 0)
+        i1 = min(indices[1] + 1, len(x_data))
+        # Reuse the last trace when the same span is shown at the same width (replots,
+        # switching back to a dataset, returning to the full view)
+        key = (dataset.x_axis_adjusted, dataset.calib_key, i0, i1, int(self.ax.bbox.width))
+        if dataset.trace_cache is None or dataset.trace_cache[0] != key:
+            dataset.trace_cache = (key, _decimate(x_data[i0:i1], y_data[i0:i1], key[-1]))
+        return dataset.trace_cache[1]
+        
+    def on_xlim_changed(self, ax):
+        """Re-decimate the raw spectrum for the new visible x range"""
+        dataset = self.current_dataset
+        if dataset and self._raw_line is not None and dataset.x is not None:
+            self._raw_line.set_data(*self.raw_trace(dataset, *sorted(ax.get_xlim())))
+        
+    def on_canvas_resize(self, event):
+        """Re-decimate the raw spectrum for the new axes width in pixels"""
+        self.on_xlim_changed(self.ax)
+        
+    def add_roi_overlay(self, dataset):
+        """Create ROI regions, fit curves and the legend as overlay artists
+
+        Artists whose content is unchanged since the last overlay are reused;
+        the rest are created here and any left over are removed.
+        """
+        y_min, y_max = self._y_limits
+        overlay = self._overlay_artists
+        cached_artists = self._roi_artists.pop(id(dataset), {})
+        dataset_artists = self._roi_artists[id(dataset)] = {}
+        
+        def roi_artists(key, content, create):
+            """Artists for key, reused if they were built for the same content"""
+            cached = cached_artists.pop(key, None)
+            if cached is None or cached[0] != content:
+                if cached is not None:
+                    for artist in cached[1]:
+                        artist.remove()
+                cached = (content, create())
+            else:
+                for artist in cached[1]:
+                    artist.set_visible(True)
+            dataset_artists[key] = cached
+            overlay.extend(cached[1])
+            return cached[1]
+        
         # Plot ROI regions and fits based on their state
         legend_handles = []
         legend_labels = []
         
         # Add raw data to legend
-        line, = self.ax.plot([], [], 'k-', lw=1)
-        legend_handles.append(line)
+        legend_handles.append(self._raw_line)
         legend_labels.append('Raw data')
+        legend_key = [('Raw data', 'k')]
+        
+        # Region boxes (x, width, colour) of unfitted ROIs, drawn together as one collection
+        roi_boxes = []
         
         for i, roi in enumerate(dataset.selected_regions):
             # Check if this ROI has been fitted
@@ -789,56 +1441,146 @@ class XRDDataAnalyzer(QMainWindow):
             
             if not is_fitted:
                 # Show region box and label for unfitted ROIs
-                rect = Rectangle(
-                    (roi['x_min'], y_min),
-                    roi['width'], y_max - y_min,
-                    facecolor=roi['color'], alpha=0.3,
-                    edgecolor=roi['color'], lw=1
-                )
-                # Store rect reference for clear_all
-                roi['rect'] = rect
-                self.ax.add_patch(rect)
-                self.ax.text(roi['x_min'] + roi['width']/2, 
-                            y_max,
-                            f"Region {i+1} ({roi['x_min']:.2f}-{roi['x_max']:.2f} keV)",
-                            color=roi['color'], ha='center', va='top', fontsize=10)
+                roi_boxes.append((roi['x_min'], roi['width'], roi['color']))
+                roi_artists(id(roi), ('region', i, roi['x_min'], roi['x_max'], roi['color'], y_max),
+                            lambda: [self.ax.text(roi['x_min'] + roi['width']/2, 
+                                y_max,
+                                f"Region {i+1} ({roi['x_min']:.2f}-{roi['x_max']:.2f} keV)",
+                                color=roi['color'], ha='center', va='top', fontsize=10)])
                 
                 # Add to legend
-                patch = Rectangle((0,0), 1, 1, facecolor=roi['color'], alpha=0.3)
+                patch = self._legend_proxies.get(roi['color'])
+                if patch is None:
+                    patch = self._legend_proxies[roi['color']] = Rectangle(
+                        (0,0), 1, 1, facecolor=roi['color'], alpha=0.3)
                 legend_handles.append(patch)
                 legend_labels.append(f'Region {i+1} ({roi["x_min"]:.2f}-{roi["x_max"]:.2f} keV)')
+                legend_key.append((legend_labels[-1], roi['color']))
             else:
                 # Show fit line for fitted ROIs
                 result = dataset.fit_results[i]
-                x_fit = np.linspace(roi['x_min'], roi['x_max'], 100)
-                y_fit = self.gaussian_with_baseline(x_fit, *result['params'])
+                if 'fit_curve' not in roi:
+                    roi['fit_curve'] = self.fit_curve(roi, result['params'])
                 
                 line_color = roi['color']
-                line, = self.ax.plot(x_fit, y_fit, '--', color=line_color, lw=1.5)
+                center = result['params'][1]
+                fwhm = result['fwhm']
+                
+                def create_fit_artists():
+                    # Fit line, then center and FWHM annotations
+                    line, = self.ax.plot(*roi['fit_curve'], '--', color=line_color, lw=1.5)
+                    return [line,
+                            self.ax.axvline(x=center, color=line_color, linestyle=':', alpha=0.7),
+                            self.ax.axvspan(center - fwhm/2, center + fwhm/2, 
+                                            color=line_color, alpha=0.1)]
+                line = roi_artists(id(roi), ('fit', tuple(result['params']), fwhm, line_color),
+                                   create_fit_artists)[0]
                 
                 # Add to legend
                 legend_handles.append(line)
                 legend_labels.append(f'Fit {i+1} ({roi["x_min"]:.2f}-{roi["x_max"]:.2f} keV)')
-                
-                # Annotate center and FWHM
-                center = result['params'][1]
-                fwhm = result['fwhm']
-                self.ax.axvline(x=center, color=line_color, linestyle=':', alpha=0.7)
-                self.ax.axvspan(center - fwhm/2, center + fwhm/2, 
-                               color=line_color, alpha=0.1)
+                legend_key.append((legend_labels[-1], line_color))
+        
+        if roi_boxes:
+            roi_artists('boxes', (tuple(roi_boxes), y_min, y_max), lambda: [self.ax.add_collection(
+                PatchCollection(
+                    [Rectangle((x0, y_min), width, y_max - y_min) for x0, width, _ in roi_boxes],
+                    facecolors=[color for *_, color in roi_boxes],
+                    edgecolors=[color for *_, color in roi_boxes],
+                    alpha=0.3, linewidths=1), autolim=False)])
+        
+        # Remove artists of ROIs that are gone or no longer drawn this way
+        for _, artists in cached_artists.values():
+            for artist in artists:
+                artist.remove()
+        
+        # The legend copies its handles' styles, so it can be kept while the entries match
+        if legend_key != self._legend_key:
+            self.remove_legend()
+            self._legend = self.ax.legend(legend_handles, legend_labels, loc='upper right', 
+                         framealpha=0.7, fancybox=True, prop={'family': 'Arial', 'size': 10})
+            self._legend_key = legend_key
+        overlay.append(self._legend)
+        
+    def clear_overlay(self):
+        """Remove the ROI overlay artists of all datasets, keeping the cached legend"""
+        for dataset_artists in self._roi_artists.values():
+            for _, artists in dataset_artists.values():
+                for artist in artists:
+                    artist.remove()
+        self._roi_artists = {}
+        self._overlay_artists = []
+        
+    def release_overlay(self):
+        """Empty the overlay list, hiding its ROI artists for add_roi_overlay to reuse
+
+        Artists of a dataset that is not shown stay on the axes, hidden, until
+        it is shown again.
+        """
+        for artist in self._overlay_artists:
+            if artist is not self._legend:
+                artist.set_visible(False)
+        self._overlay_artists = []
+        
+    def remove_legend(self):
+        """Remove the cached legend so the next overlay builds a new one"""
+        if self._legend is not None:
+            self._legend.remove()
+        self._legend = None
+        self._legend_key = None
+        
+    def draw_background(self):
+        """Schedule a full redraw; on_canvas_draw caches it without overlay artists"""
+        for artist in self._overlay_artists:
+            artist.set_visible(False)
+        self._background = None
+        self._capture_background = True
+        self.canvas.draw_idle()
+        
+    def update_roi_overlay(self):
+        """Redraw ROI overlays over the cached background
+
+        If the background is stale (a full draw or view change since it was
+        cached) it is redrawn and recaptured with the new overlay instead,
+        keeping the current view; with no spectrum on the axes yet this is a
+        full plot_data.
+        """
+        dataset = self.current_dataset
+        if self._plot_pending:
+            return  # The pending replot rebuilds the overlay
+        if not dataset or self._raw_line is None or not hasattr(self, '_y_limits'):
+            self.plot_data()
+            return
         
-        # Set axis labels, tick labels and legend
-        self.ax.set_xlabel('Energy (keV)' if dataset.x_axis_adjusted else 'Channel', fontname='Arial', fontsize=10)
-        self.ax.set_ylabel('Intensity', fontname='Arial', fontsize=10)
-        self.ax.tick_params(axis='both', which='major', labelsize=10)
+        self.release_overlay()
+        self.add_roi_overlay(dataset)
         
-        if legend_handles:
-            self.ax.legend(legend_handles, legend_labels, loc='upper right', 
-                         framealpha=0.7, fancybox=True, prop={'family': 'Arial', 'size': 10})
+        if self._background is None or self._background_view != self.ax.viewLim.bounds:
+            self.draw_background()
+            return
+        self.canvas.restore_region(self._background)
+        for artist in self._overlay_artists:
+            self.ax.draw_artist(artist)
+        self.canvas.blit(self.figure.bbox)  # Region labels are unclipped and can extend past the axes
         
-        # 应用tight_layout并刷新画布
-        self.figure.tight_layout()
-        self.canvas.draw()
+    def on_canvas_draw(self, event):
+        """Cache the background drawn by draw_background, then draw the overlay on top
+
+        The overlay goes straight into the render buffer, which the canvas
+        paints once the draw finishes (no blit: this can run inside a paint
+        event). Any other full redraw (pan/zoom, resize, ...) invalidates the
+        cached background.
+        """
+        if not self._capture_background:
+            self._background = None
+            return
+        self._capture_background = False
+        self._background = self.canvas.copy_from_bbox(self.figure.bbox)
+        self._background_view = self.ax.viewLim.bounds
+        
+        for artist in self._overlay_artists:
+            artist.set_visible(True)
+            self.ax.draw_artist(artist)
         
     def toggle_roi_selection(self, active):
         """Enable/disable ROI selection mode"""
@@ -847,6 +1589,8 @@ class XRDDataAnalyzer(QMainWindow):
             self.statusBar().showMessage("Click and drag to select a region of interest")
         else:
             self.statusBar().showMessage("ROI selection canceled", 3000)
+            if self.current_roi is not None:
+                self._drag_rect.set_visible(False)
             self.current_roi = None
     
     def on_press(self, event):
@@ -854,11 +1598,24 @@ class XRDDataAnalyzer(QMainWindow):
         if not self.region_selection_active or event.inaxes != self.ax:
             return
             
-        # Start a new ROI
+        # Start a new ROI with the animated selection box; while dragging, the box is
+        # blitted over a snapshot of the axes instead of redrawing the figure
+        if self._drag_rect is None:
+            self._drag_rect = Rectangle(
+                (0, 0), 0, 0,
+                facecolor='gray', alpha=0.3, edgecolor='gray', animated=True, visible=False
+            )
+            self.ax.add_patch(self._drag_rect)
+        y_min, y_max = self.ax.get_ylim()
+        self._drag_rect.set_bounds(event.xdata, y_min, 0, y_max - y_min)
+        self._drag_rect.set_visible(True)
+        x_lo, x_hi = self.ax.get_xlim()
         self.current_roi = {
             'x_min': event.xdata,
             'y_min': event.ydata,
-            'rect': None  # Rectangle will be created on release
+            'background': self.canvas.copy_from_bbox(self.ax.bbox),
+            'last_x': event.xdata,  # Box edge last drawn
+            'px_eps': abs(x_hi - x_lo) / max(self.ax.bbox.width, 1)  # One pixel in data units
         }
         
     def on_motion(self, event):
@@ -866,42 +1623,38 @@ class XRDDataAnalyzer(QMainWindow):
         if not self.region_selection_active or self.current_roi is None:
             return
             
-        # Update current selection box if it exists
-        if 'rect' in self.current_roi and self.current_roi['rect']:
-            self.current_roi['rect'].remove()
-            
-        # Draw temporary selection box
+        # Update the selection box and blit it over the axes snapshot; moves of
+        # less than a pixel would not change the picture, so they are skipped
         if event.inaxes == self.ax:
+            if abs(event.xdata - self.current_roi['last_x']) < self.current_roi['px_eps']:
+                return
+            self.current_roi['last_x'] = event.xdata
             x_min = min(self.current_roi['x_min'], event.xdata)
             x_max = max(self.current_roi['x_min'], event.xdata)
             self.current_roi['width'] = max(0.001, x_max - x_min)
-            y_min, y_max = self.ax.get_ylim()
-            height = y_max - y_min
             
-            rect = Rectangle(
-                (x_min, y_min),
-                self.current_roi['width'], height,
-                facecolor='gray', alpha=0.3, edgecolor='gray'
-            )
-            self.ax.add_patch(rect)
-            self.current_roi['rect'] = rect
-            self.canvas.draw_idle()
+            self._drag_rect.set_x(x_min)
+            self._drag_rect.set_width(self.current_roi['width'])
+            self.canvas.restore_region(self.current_roi['background'])
+            self.ax.draw_artist(self._drag_rect)
+            self.canvas.blit(self.ax.bbox)
             
     def on_release(self, event):
         """Handle mouse release event for ROI selection"""
         if not self.region_selection_active or self.current_roi is None:
             return
             
+        # Hide the selection box and restore the axes as they were before the drag
+        self._drag_rect.set_visible(False)
+        self.canvas.restore_region(self.current_roi['background'])
+        self.canvas.blit(self.ax.bbox)
+        
         if event.inaxes == self.ax and abs(event.xdata - self.current_roi['x_min']) > 0.001:
             # Calculate min and max x values
             x_min = min(self.current_roi['x_min'], event.xdata)
             x_max = max(self.current_roi['x_min'], event.xdata)
             width = abs(x_max - x_min)
             
-            # Remove temporary rectangle
-            if 'rect' in self.current_roi and self.current_roi['rect']:
-                self.current_roi['rect'].remove()
-            
             # Get next color from color list
             dataset = self.current_dataset
             if dataset:
@@ -909,15 +1662,18 @@ class XRDDataAnalyzer(QMainWindow):
                 color = self.colors[color_idx]
                 
                 # Add to dataset's selected regions
+                indices = dataset.roi_indices(x_min, x_max)
                 dataset.selected_regions.append({
                     'x_min': x_min,
                     'x_max': x_max,
                     'width': width,
-                    'color': color
+                    'color': color,
+                    'brushes': FitResultsModel.region_brushes(color),  # Result table row colours
+                    'indices': indices  # Slice bounds into dataset.sorted_data()
                 })
                 
                 # Update plot with new ROI
-                self.plot_data()
+                self.update_roi_overlay()
                 
                 # Disable selection mode automatically
                 self.select_btn.setChecked(False)
@@ -927,28 +1683,49 @@ class XRDDataAnalyzer(QMainWindow):
         self.current_roi = None
         
     def fit_peaks(self):
-        """Perform Gaussian fit on selected ROIs"""
+        """Perform Gaussian fit on selected ROIs
+
+        The ROI slices and initial guesses are prepared here; the fits run on a
+        FitTask worker so the window stays responsive, and on_roi_fitted /
+        on_fit_finished collect the results.
+        """
         dataset = self.current_dataset
         if not dataset or not dataset.selected_regions:
             QMessageBox.warning(self, "Warning", "No regions selected for fitting")
             return
+        if self._fit_task is not None:
+            self.statusBar().showMessage("Fitting already in progress", 3000)
+            return
             
-        # Get X and Y data
-        data = dataset.adjusted_data if dataset.x_axis_adjusted else dataset.raw_data
-        x_data = data[:, 0]
-        y_data = data[:, 1]
+        # Get X and Y data, ordered by x so each ROI is a contiguous slice, as float64
+        # once here so the fits' slices need no per-ROI conversion
+        x_data, y_data = dataset.fit_data()
         
-        # Clear previous fit results
+        # Clear previous fit results, and the rows the table still shows for them
         dataset.fit_results = []
+        self.update_result_table()
         
+        # Look up slice bounds for all ROIs that lack them in one vectorised search
+        pending = [roi for roi in dataset.selected_regions if 'indices' not in roi]
+        if pending:
+            starts, stops = dataset.roi_indices(
+                np.array([roi['x_min'] for roi in pending]),
+                np.array([roi['x_max'] for roi in pending]))
+            for roi, i0, i1 in zip(pending, starts, stops):
+                roi['indices'] = (i0, i1)
+        
+        jobs = []  # (roi, x, y, p0, bounds) for the worker, in ROI order
         for roi in dataset.selected_regions:
-            # Get data within region
-            mask = (x_data >= roi['x_min']) & (x_data <= roi['x_max'])
-            if not np.any(mask):
+            # Drop the plotted curve of any previous fit
+            roi.pop('fit_curve', None)
+            
+            # Get data within region as a contiguous slice of the x-sorted data
+            i0, i1 = roi['indices']
+            roi_x = x_data[i0:i1]
+            roi_y = y_data[i0:i1]
+            if len(roi_x) == 0:
                 continue
                 
-            roi_x = x_data[mask]
-            roi_y = y_data[mask]
             if len(roi_x) < MIN_FIT_POINTS:
                 QMessageBox.warning(
                     self,
@@ -957,8 +1734,9 @@ class XRDDataAnalyzer(QMainWindow):
                 )
                 continue
             
-            # Initial guess for parameters
-            peak_idx = np.argmax(roi_y)
+            # Initial guess for parameters; the peak may sit anywhere in a hand-drawn
+            # ROI, so the whole ROI is searched
+            peak_idx = int(np.argmax(roi_y))
             a_guess = max(roi_y[peak_idx] - np.min(roi_y), np.finfo(float).eps)  # Peak height above baseline
             x0_guess = roi_x[peak_idx]  # Peak center
             roi_width = max(roi['x_max'] - roi['x_min'], np.finfo(float).eps)
@@ -971,50 +1749,106 @@ class XRDDataAnalyzer(QMainWindow):
             p0 = [a_guess, x0_guess, sigma_guess, b_guess, c_guess]
             bounds = ([0, roi['x_min'], np.finfo(float).eps, -np.inf, -np.inf], 
                      [np.inf, roi['x_max'], roi_width, np.inf, np.inf])
+            jobs.append((roi, roi_x, roi_y, p0, bounds))
+        
+        if not jobs:
+            self.update_result_table()
+            self.update_roi_overlay()
+            return
+        
+        # Run the fits on a worker; results arrive through queued signals
+        task = FitTask(self._fit_roi, jobs)
+        task.signals.fitted.connect(lambda roi, result: self.on_roi_fitted(dataset, roi, result))
+        task.signals.finished.connect(lambda: self.on_fit_finished(dataset))
+        self._fit_task = task  # Keep the signals object alive until delivery
+        self._fit_batch = []
+        self.fit_btn.setEnabled(False)
+        self.statusBar().showMessage(f"Fitting {len(jobs)} ROI(s)...")
+        QThreadPool.globalInstance().start(task)
+        
+    def _fit_roi(self, roi, roi_x, roi_y, p0, bounds):
+        """Fit one ROI and derive R², FWHM and peak area; runs on the FitTask worker"""
+        try:
+            # Perform fit
+            popt, pcov = self._fit_gaussian(roi_x, roi_y, p0, bounds)
             
-            try:
-                # Perform fit
-                popt, pcov = curve_fit(self.gaussian_with_baseline, roi_x, roi_y, 
-                                     p0=p0, bounds=bounds, maxfev=5000)
-                
-                # Calculate goodness of fit (R²)
-                y_fit = self.gaussian_with_baseline(roi_x, *popt)
-                ss_res = np.sum((roi_y - y_fit) ** 2)
-                ss_tot = np.sum((roi_y - np.mean(roi_y)) ** 2)
-                r_squared = np.nan if ss_tot == 0 else 1 - (ss_res / ss_tot)
-                
-                # Calculate FWHM: 2*sqrt(2*ln(2))*sigma
-                fwhm = 2 * np.sqrt(2 * np.log(2)) * popt[2]
-                
-                # Calculate peak area: integral of Gaussian only
-                x_fine = np.linspace(roi['x_min'], roi['x_max'], 1000)
-                baseline = popt[3] * x_fine + popt[4]
-                gaussian = popt[0] * np.exp(-(x_fine - popt[1])**2 / (2 * popt[2]**2))
-                integral = simps(gaussian, x_fine)
-                
-                # Store fit results
-                dataset.fit_results.append({
-                    'params': popt,
-                    'cov': pcov,
-                    'fwhm': fwhm,
-                    'integral': integral,
-                    'r_squared': r_squared
-                })
-                
-            except Exception as e:
-                print(f"Fit error: {str(e)}")
-                # Add dummy results
-                dataset.fit_results.append({
-                    'params': p0,
-                    'cov': np.zeros((5, 5)),
-                    'fwhm': 0,
-                    'integral': 0,
-                    'r_squared': 0
-                })
+            # Calculate goodness of fit (R²), reusing this ROI's model buffer
+            buf = roi.get('model_buffer')
+            if buf is None or buf.shape != roi_x.shape:
+                buf = roi['model_buffer'] = np.empty(roi_x.shape)
+            y_fit = self.gaussian_with_baseline(roi_x, *popt, out=buf)
+            ss_res = np.sum((roi_y - y_fit) ** 2)
+            if 'ss_tot' not in roi:  # Depends only on the ROI data; reused on refits
+                roi['ss_tot'] = float(np.sum((roi_y - np.mean(roi_y)) ** 2))
+            ss_tot = roi['ss_tot']
+            r_squared = np.nan if ss_tot == 0 else 1 - (ss_res / ss_tot)
+            
+            # Calculate FWHM: 2*sqrt(2*ln(2))*sigma
+            fwhm = FWHM_SIGMA * popt[2]
+            
+            # Calculate peak area: integral of Gaussian only over the ROI (closed form)
+            erf_scale = popt[2] * math.sqrt(2)
+            integral = popt[0] * popt[2] * math.sqrt(math.pi / 2) * (
+                math.erf((roi['x_max'] - popt[1]) / erf_scale)
+                - math.erf((roi['x_min'] - popt[1]) / erf_scale))
+            
+            return {
+                'params': popt,
+                'cov': pcov,
+                'fwhm': fwhm,
+                'integral': integral,
+                'r_squared': r_squared
+            }
+            
+        except Exception as e:
+            print(f"Fit error: {str(e)}")
+            # Dummy results
+            return {
+                'params': p0,
+                'cov': np.zeros((5, 5)),
+                'fwhm': 0,
+                'integral': 0,
+                'r_squared': 0
+            }
         
-        # Update plot and result table
-        self.update_result_table()
-        self.plot_data()
+    def on_roi_fitted(self, dataset, roi, result):
+        """Store one FitTask result, unless its ROI was cleared meanwhile"""
+        if any(region is roi for region in dataset.selected_regions):
+            dataset.fit_results.append(result)
+            self._fit_batch.append((roi, result))
+            
+    def on_fit_finished(self, dataset):
+        """Plot the results of a finished FitTask and update the result table"""
+        self._fit_task = None
+        self.fit_btn.setEnabled(bool(self.datasets))
+        batch, self._fit_batch = self._fit_batch, []
+        
+        # Sample all fitted curves for plotting in one batched evaluation, once, not on every redraw
+        if batch:
+            x_fits, y_fits = self.fit_curves([roi for roi, _ in batch],
+                                             [result['params'] for _, result in batch])
+            for (roi, _), x_fit, y_fit in zip(batch, x_fits, y_fits):
+                roi['fit_curve'] = (x_fit, y_fit)
+        self.statusBar().showMessage(f"Fitted {len(batch)} ROI(s)", 3000)
+        
+        # Update result table and draw the fits over the unchanged spectrum
+        if dataset is self.current_dataset:
+            self.update_result_table()
+            self.update_roi_overlay()
+        
+    def fit_curve(self, roi, params):
+        """(x, y) samples of a fitted model across an ROI, for plotting"""
+        x_fits, y_fits = self.fit_curves([roi], [params])
+        return x_fits[0], y_fits[0]
+        
+    def fit_curves(self, rois, params):
+        """Sample the fitted models of several ROIs at once, as (N, 100) x and y arrays"""
+        x_fits = np.linspace([roi['x_min'] for roi in rois], [roi['x_max'] for roi in rois],
+                             100, axis=-1)
+        # One (N, 1) column per model parameter, broadcast along each ROI's row
+        columns = np.asarray(params, dtype=np.float64).T[:, :, np.newaxis]
+        y_fits = self.gaussian_with_baseline(x_fits, *columns)
+        return x_fits.astype(np.float32), y_fits.astype(np.float32)
         
     def clear_all(self):
         """Clear all ROIs and fit results"""
@@ -1026,52 +1860,35 @@ class XRDDataAnalyzer(QMainWindow):
         if hasattr(self, '_y_limits'):
             delattr(self, '_y_limits')
             
-        # Use try/except to handle case where 'rect' key might not exist
-        for roi in dataset.selected_regions:
-            try:
-                if 'rect' in roi and roi['rect']:
-                    roi['rect'].remove()
-            except:
-                pass  # Skip if rect can't be removed
-        
         dataset.selected_regions = []
         dataset.fit_results = []
         
         # Update UI
-        self.result_table.setRowCount(0)
+        self.update_result_table()
         self.plot_data()
         self.statusBar().showMessage("All ROIs and fit results cleared", 3000)
     
     def adjust_energy_axis(self):
         """Apply energy calibration to current dataset"""
         dataset = self.current_dataset
-        if not dataset or dataset.raw_data is None:
+        if not dataset or dataset.channels is None:
             QMessageBox.warning(self, "Warning", "No data loaded for calibration")
             return
             
         # Get calibration parameters
         try:
-            a = float(self.findChild(QLineEdit, "a_edit").text())
-            b = float(self.findChild(QLineEdit, "b_edit").text())
-            c = float(self.findChild(QLineEdit, "c_edit").text())
+            a = float(self.a_edit.text())
+            b = float(self.b_edit.text())
+            c = float(self.c_edit.text())
         except ValueError:
             QMessageBox.critical(self, "Error", "Invalid calibration parameters")
             return
             
         # Apply calibration: E = a*Ch² + b*Ch + c
-        channels = dataset.raw_data[:, 0]
-        counts = dataset.raw_data[:, 1]
-        energies = a * channels**2 + b * channels + c
-        
-        # Store calibrated data
-        dataset.adjusted_data = np.column_stack((energies, counts))
-        dataset.x_axis_adjusted = True
+        dataset.apply_calibration(a, b, c)
         
-        # Clear previous ROIs and fit results as they're now invalid
+        # Clear previous ROIs and fit results as they're now invalid (this also replots)
         self.clear_all()
-        
-        # Update plot
-        self.plot_data()
         self.statusBar().showMessage(f"Calibration applied: E = {a:.6f}*Ch² + {b:.6f}*Ch + {c:.6f}", 5000)
         
     def calibrate_2theta(self):
@@ -1097,21 +1914,19 @@ class XRDDataAnalyzer(QMainWindow):
             return
             
         try:
-            # Prepare arrays for calculation and display
-            twotheta_values = []
-            
-            for d, E in pairs:
-                # Calculate 2θ directly using Bragg's law: 2θ = 2*arcsin(hc/(2dE))
-                arg = HC_KEV_ANGSTROM / (2 * d * E)
-                if not 0 < arg <= 1:
-                    raise ValueError(f"Invalid Bragg input d={d:.5f}, E={E:.5f}: asin argument={arg:.6f}")
-                twotheta_deg = 2 * np.degrees(np.arcsin(arg))
-                twotheta_values.append(twotheta_deg)
+            # Calculate 2θ for all pairs at once using Bragg's law: 2θ = 2*arcsin(hc/(2dE))
+            d_arr, e_arr = np.asarray(pairs, dtype=np.float64).T
+            args = HC_KEV_ANGSTROM / (2 * d_arr * e_arr)
+            invalid = np.flatnonzero(~((args > 0) & (args <= 1)))
+            if invalid.size:
+                i = invalid[0]
+                raise ValueError(f"Invalid Bragg input d={d_arr[i]:.5f}, E={e_arr[i]:.5f}: asin argument={args[i]:.6f}")
+            twotheta_values = 2 * np.degrees(np.arcsin(args))
             
             # Calculate average and standard deviation
-            avg_2theta = np.mean(twotheta_values)
-            std_2theta = np.std(twotheta_values, ddof=1) if len(twotheta_values) > 1 else 0.0
-            residuals = [value - avg_2theta for value in twotheta_values]
+            avg_2theta = twotheta_values.mean()
+            std_2theta = twotheta_values.std(ddof=1) if len(twotheta_values) > 1 else 0.0
+            residuals = twotheta_values - avg_2theta
             
             # Store calibration parameters
             self.calibrated = True
@@ -1126,7 +1941,7 @@ class XRDDataAnalyzer(QMainWindow):
             # Prepare status text
             status_text = f"2θ = {avg_2theta:.5f}° ± {std_2theta:.5f}° (n={len(pairs)})"
             if len(pairs) > 1:
-                max_abs_resid = max(abs(value) for value in residuals)
+                max_abs_resid = np.abs(residuals).max()
                 status_text += f"\nmax residual = {max_abs_resid:.5f}°"
             
             self.calib_status.setText(status_text)
@@ -1186,7 +2001,7 @@ class XRDDataAnalyzer(QMainWindow):
     def export_data(self):
         """Export calibrated data"""
         dataset = self.current_dataset
-        if not dataset or dataset.adjusted_data is None:
+        if not dataset or dataset.channels is None:
             QMessageBox.warning(self, "Warning", "No data available for export")
             return
         
@@ -1206,8 +2021,12 @@ class XRDDataAnalyzer(QMainWindow):
             self.settings.setValue("last_export_dir", os.path.dirname(filename))
         if filename:
             try:
-                np.savetxt(filename, dataset.adjusted_data, 
-                          header="Energy(keV)\tCounts", fmt="%.5f")
+                # Same layout as np.savetxt(fmt="%.5f"), but all rows are formatted by
+                # one %-operation and written in a single call
+                data = dataset.adjusted_data
+                with open(filename, 'w') as f:
+                    f.write("# Energy(keV)\tCounts\n")
+                    f.write(("%.5f %.5f\n" * len(data)) % tuple(data.ravel()))
                 self.statusBar().showMessage(f"Data exported to: {filename}", 5000)
             except Exception as e:
                 QMessageBox.critical(self, "Error", f"Export failed: {str(e)}")
@@ -1226,51 +2045,33 @@ class XRDDataAnalyzer(QMainWindow):
 
     def closeEvent(self, event):
         """Handle window close event - save all settings"""
-        # Save splitter positions
-        if hasattr(self, 'settings'):
-            mainSplitter = self.findChild(QSplitter, "mainSplitter")
-            if mainSplitter:
-                self.settings.setValue("mainSplitter", mainSplitter.saveState())
-                
-            rightSplitter = self.findChild(QSplitter, "rightSplitter")
-            if rightSplitter:
-                self.settings.setValue("rightSplitter", rightSplitter.saveState())
-                
-        # Save column widths
-        self.save_column_widths()
-        self.save_calib_column_widths()
+        # Save splitter positions and column widths (also flushes a pending debounced save)
+        self.save_layout_state()
         
         # Save energy calibration parameters (a, b, c)
         try:
-            a = self.findChild(QLineEdit, "a_edit").text()
-            b = self.findChild(QLineEdit, "b_edit").text()
-            c = self.findChild(QLineEdit, "c_edit").text()
-            self.settings.setValue("energy_calib/a", a)
-            self.settings.setValue("energy_calib/b", b)
-            self.settings.setValue("energy_calib/c", c)
+            self.settings.beginGroup("energy_calib")
+            for key, edit in (("a", self.a_edit), ("b", self.b_edit), ("c", self.c_edit)):
+                self.settings.setValue(key, edit.text())
+            self.settings.endGroup()
             self.settings.setValue("import/skip_last_row", self.skip_last_row_checkbox.isChecked())
         except:
             pass
             
-        # Save calibration table data (d values and remarks)
-        calib_data = []
-        for row in range(self.calib_table.rowCount()):
-            row_data = {}
-            d_item = self.calib_table.item(row, 0)
-            e_item = self.calib_table.item(row, 1)
-            remarks_item = self.calib_table.item(row, 2)
-            
-            if d_item and d_item.text():
-                row_data['d'] = d_item.text()
-            if e_item and e_item.text():
-                row_data['e'] = e_item.text()
-            if remarks_item and remarks_item.text():
-                row_data['remarks'] = remarks_item.text()
-                
-            if row_data:  # Only add if we have some data
-                calib_data.append(row_data)
-                
-        self.settings.setValue("calib_table/data", calib_data)
+        # Save calibration table data (d values and remarks), non-empty cells only
+        calib_keys = ('d', 'e', 'remarks')
+        rows = ({key: item.text()
+                 for key, item in zip(calib_keys, (self.calib_table.item(row, col) for col in range(3)))
+                 if item and item.text()}
+                for row in range(self.calib_table.rowCount()))
+        calib_data = [row_data for row_data in rows if row_data]  # Only rows with some data
+        
+        self.settings.beginGroup("calib_table")
+        self.settings.setValue("data", calib_data)
+        self.settings.endGroup()
+        
+        # Write everything to disk once, rather than leaving it to QSettings' timer
+        self.settings.sync()
         
         # Proceed with standard close event
         super().closeEvent(event)
@@ -1285,34 +2086,42 @@ class XRDDataAnalyzer(QMainWindow):
         if filename:
             self.settings.setValue("last_import_dir", os.path.dirname(filename))
         if filename:
-            try:
-                # Load the data
-                raw_data = np.loadtxt(filename)
-                if raw_data.ndim != 2 or raw_data.shape[1] < 2:
-                    raise ValueError("Data requires at least 2 columns")
-                
-                # SSRF exports may include a non-data trailer row; keep this user-controllable.
-                if self.skip_last_row_checkbox.isChecked() and len(raw_data) > 0:
-                    raw_data = raw_data[:-1]
-                    self.statusBar().showMessage(f"Loaded data and removed last row", 2000)
-                
-                # Create new dataset
-                dataset = Dataset(filename=filename, raw_data=raw_data)
-                self.datasets.append(dataset)
-                self.current_dataset_index = len(self.datasets) - 1
-                
-                # Reset Y-axis limits for new data
-                if hasattr(self, '_y_limits'):
-                    delattr(self, '_y_limits')
-                
-                # Update UI
-                self.filename_label.setText(dataset.name)
-                self.update_dataset_selector()
-                self.plot_data()
-                
-                self.statusBar().showMessage(f"Successfully loaded: {filename}", 5000)
-            except Exception as e:
-                QMessageBox.critical(self, "Error", f"Data loading failed: {str(e)}")
+            # Parse on a worker thread; on_data_loaded adds the dataset when ready
+            task = LoaderTask(filename, self.skip_last_row_checkbox.isChecked())
+            task.signals.loaded.connect(self.on_data_loaded)
+            task.signals.failed.connect(self.on_data_load_failed)
+            self._loader_task = task  # Keep the signals object alive until delivery
+            self.import_btn.setEnabled(False)
+            self.statusBar().showMessage(f"Loading: {filename}")
+            QThreadPool.globalInstance().start(task)
+            
+    def on_data_loaded(self, dataset, trimmed):
+        """Add a dataset parsed by LoaderTask and show it"""
+        self._loader_task = None
+        self.import_btn.setEnabled(True)
+        self.datasets.append(dataset)
+        self.current_dataset_index = len(self.datasets) - 1
+        
+        # Reset Y-axis limits for new data
+        if hasattr(self, '_y_limits'):
+            delattr(self, '_y_limits')
+        
+        # Update UI
+        self.filename_label.setText(dataset.name)
+        self.update_dataset_selector()
+        self.plot_data()
+        
+        if trimmed:
+            self.statusBar().showMessage(f"Successfully loaded: {dataset.filename} (last row removed)", 5000)
+        else:
+            self.statusBar().showMessage(f"Successfully loaded: {dataset.filename}", 5000)
+        
+    def on_data_load_failed(self, message):
+        """Report a LoaderTask failure"""
+        self._loader_task = None
+        self.import_btn.setEnabled(True)
+        self.statusBar().clearMessage()
+        QMessageBox.critical(self, "Error", f"Data loading failed: {message}")
 
 # Main application entry point
 if __name__ == "__main__":